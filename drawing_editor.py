@@ -1,8 +1,40 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
+from functools import partial
+import mmap
+import os
+import re
 import sys
+import struct
 import xml.etree.ElementTree as ET
 
+# numpy is optional and imported by load_numpy when the first shape is indexed, since importing it
+# takes longer than loading the rest of the editor. On PyPy it runs through the slow cpyext layer and
+# the JIT-compiled pure Python code paths are faster, so it is only used on CPython.
+np = None
+numpy_checked = False
+
+# Rectangle corner styles
+STYLE_SQUARE = "s"
+STYLE_ROUNDED = "r"
+
+# Colors offered for new shapes, as shown in the Draw menu
+COLORS = ("Black", "Blue", "Green", "Red")
+
+# One line of a text drawing file: kind, x1, y1, x2, y2, color and, for rectangles, style.
+# Fractional coordinates written by older versions are truncated to their integer part.
+SHAPE_LINE_PATTERN = re.compile(r"(line|rectangle)" + r" (-?\d+)(?:\.\d*)?" * 4 + r" (\S+)(?: ([sr]))?")
+
+# Binary drawing file layout: a header, a table of the colors used, then one fixed-size record per shape.
+DRAWING_MAGIC = b"DRW1"
+DRAWING_HEADER = struct.Struct("<4sHI")     # magic, number of colors, number of shapes
+DRAWING_COLOR = struct.Struct("<H")         # length of the color name that follows
+DRAWING_RECORD = struct.Struct("<BiiiiHB")  # kind, x1, y1, x2, y2, color index, style
+KIND_LINE, KIND_RECTANGLE = 0, 1
+STYLE_CODES = {STYLE_SQUARE: 0, STYLE_ROUNDED: 1}
+STYLE_NAMES = (STYLE_SQUARE, STYLE_ROUNDED)
+FILE_TYPES = [("Text files", "*.txt"), ("Drawing files", "*.drw")]
+
 class FileManager:
     """
     Manages file operations such as saving and opening files for a drawing application.
@@ -26,15 +58,33 @@ class FileManager:
         if self.current_file:
             filename = self.current_file
         else:
-            filename = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt")])
+            filename = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=FILE_TYPES)
             if not filename:
                 return
-        canvas.construct_shape_from_shape_object()
-        with open(filename, 'w') as file:
-            for shape in canvas.shapes:
-                file.write(f"{shape}\n")
+        if filename.endswith(".drw"):
+            self.write_file(filename, self.pack_shapes(canvas.shape_object.values()))
+        else:
+            canvas.construct_shape_from_shape_object()
+            self.write_file(filename, "".join(f"{shape}\n" for shape in canvas.shapes).encode())
         self.unsaved_changes = False
 
+    def write_file(self, filename, data):
+        """
+        Replaces the contents of a file with the given bytes. The data is handed to the OS directly,
+        bypassing Python's text encoding and buffering layers.
+
+        Args:
+            filename (str): The file to write.
+            data (bytes): The complete new file contents.
+        """
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            remaining = memoryview(data)
+            while remaining:
+                remaining = remaining[os.write(fd, remaining):]
+        finally:
+            os.close(fd)
+
     def open_file(self, canvas):
         """
         Opens a file containing shapes data and loads it into the canvas. Warns the user of unsaved changes.
@@ -45,18 +95,119 @@ class FileManager:
         if self.unsaved_changes:
             if not messagebox.askokcancel("Unsaved Changes", "You have unsaved changes. Do you want to continue?"):
                 return
-        filename = filedialog.askopenfilename(filetypes=[("Text files", "*.txt")])
+        filename = filedialog.askopenfilename(filetypes=FILE_TYPES)
         if filename:
-            canvas.file_opened = True
-            canvas.shapes.clear()
-            canvas.delete("all")
-            with open(filename, 'r') as file:
-                for line in file:
-                    canvas.shapes.append(line.strip())
-            canvas.redraw_shapes()
+            data = self.map_file(filename)
+            try:
+                if filename.endswith(".drw"):
+                    try:
+                        shapes = self.unpack_shapes(canvas, data)
+                    except (ValueError, IndexError, struct.error):
+                        messagebox.showerror("Open File", f"{filename} is not a valid drawing file.")
+                        return
+                else:
+                    lines = data[:].decode().splitlines()
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+            canvas.clear_drawing()
+            if filename.endswith(".drw"):
+                canvas.draw_loaded_shapes(shapes)
+            else:
+                canvas.shapes.extend(lines)
+                skipped = canvas.redraw_shapes()
+                if skipped:
+                    messagebox.showwarning("Open File", f"{len(skipped)} line(s) of {filename} do not describe a shape "
+                                           f"and were skipped, starting with:\n{skipped[0]}")
             self.current_file = filename
             self.unsaved_changes = False
 
+    def map_file(self, filename):
+        """
+        Maps a file into memory for reading so its contents are served from the page cache without
+        an extra copy. Files that cannot be mapped, such as empty files, are read into memory instead.
+
+        Args:
+            filename (str): The file to read.
+
+        Returns:
+            mmap.mmap | bytes: The file contents. A returned map must be closed by the caller.
+        """
+        with open(filename, 'rb') as file:
+            try:
+                return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                return file.read()
+
+    def pack_shapes(self, shapes):
+        """
+        Encodes shape objects into the binary drawing file format.
+
+        Args:
+            shapes: The shape objects to encode.
+
+        Returns:
+            bytes: The header, color table and fixed-size shape records.
+        """
+        colors = {}
+        records = bytearray(DRAWING_RECORD.size * len(shapes))
+        for offset, shape in zip(range(0, len(records), DRAWING_RECORD.size), shapes):
+            color_index = colors.setdefault(shape.color, len(colors))
+            if isinstance(shape, Rectangle):
+                kind, style = KIND_RECTANGLE, STYLE_CODES[shape.style]
+            else:
+                kind, style = KIND_LINE, 0
+            DRAWING_RECORD.pack_into(records, offset, kind, round(shape.x1), round(shape.y1),
+                                     round(shape.x2), round(shape.y2), color_index, style)
+
+        color_table = bytearray()
+        for color in colors:
+            name = color.encode()
+            color_table += DRAWING_COLOR.pack(len(name)) + name
+        return DRAWING_HEADER.pack(DRAWING_MAGIC, len(colors), len(shapes)) + color_table + records
+
+    def unpack_shapes(self, canvas, data):
+        """
+        Decodes shape objects from the binary drawing file format. The shapes are not drawn.
+
+        Args:
+            canvas: The canvas object the shapes will belong to.
+            data (bytes | mmap.mmap): The file contents.
+
+        Returns:
+            list: The decoded Line and Rectangle objects.
+
+        Raises:
+            ValueError: If the data does not start with the drawing file header.
+            struct.error: If the data is truncated.
+        """
+        magic, color_count, shape_count = DRAWING_HEADER.unpack_from(data)
+        if magic != DRAWING_MAGIC:
+            raise ValueError("Not a drawing file")
+        offset = DRAWING_HEADER.size
+        colors = []
+        for _ in range(color_count):
+            (length,) = DRAWING_COLOR.unpack_from(data, offset)
+            offset += DRAWING_COLOR.size
+            colors.append(data[offset:offset + length].decode())
+            offset += length
+
+        end = offset + shape_count * DRAWING_RECORD.size
+        if end != len(data):
+            raise ValueError("Unexpected drawing file size")
+        shapes = []
+        records = memoryview(data)[offset:end]
+        try:
+            for kind, x1, y1, x2, y2, color_index, style in DRAWING_RECORD.iter_unpack(records):
+                if kind == KIND_RECTANGLE:
+                    shapes.append(Rectangle(canvas, x1, y1, x2, y2, colors[color_index], STYLE_NAMES[style]))
+                else:
+                    shapes.append(Line(canvas, x1, y1, x2, y2, colors[color_index]))
+        finally:
+            # Let the caller close a memory-mapped file once decoding is done
+            records.release()
+        return shapes
+
     def save_to_xml(self,canvas):
         """
         Saves the canvas data to an XML file. If no file is currently specified, it prompts the user for a file location.
@@ -71,30 +222,150 @@ class FileManager:
             if not filename:
                 return
 
-        root = ET.Element("shapes")
-
-        for shape in canvas.shape_object:
-            root.append(ET.fromstring(shape.to_xml()))
-
-        tree = ET.ElementTree(root)
-        tree.write(filename)
+        # Write one shape element at a time instead of building the whole document in memory
+        with open(filename, 'wb') as file:
+            file.write(b"<shapes>")
+            for shape in canvas.shape_object.values():
+                file.write(ET.tostring(shape.to_element()))
+            file.write(b"</shapes>")
 
         self.unsaved_changes = False
 
     def get_group_hierarchy(self, group, xml):
-        group_element = ET.SubElement(xml, "group")  # Create a group element under the root
-        for shape in group.indv_shapes:
-            shape_element = ET.SubElement(group_element, "shape")  # Create a shape element under the group
-            shape_element.text = shape.to_xml()  # Add shape XML representation as text to the shape element
-        if group.sub_grps:
-            for sg in group.sub_grps:
-                self.get_group_hierarchy(sg, xml)  # Update xml recursively
+        """
+        Adds a group and its nested subgroups to an XML element. Subgroups are walked with an explicit
+        stack and the result is serialized once, after the whole hierarchy has been built.
+
+        Args:
+            group: The group to add.
+            xml: The element under which the group element is created.
+
+        Returns:
+            str: The XML text of `xml` including the group hierarchy.
+        """
+        stack = [(group, xml)]
+        while stack:
+            current, parent = stack.pop()
+            group_element = ET.SubElement(parent, "group")  # Create a group element under its parent
+            for shape in current.indv_shapes:
+                ET.SubElement(group_element, "shape").text = shape.to_xml()  # Add shape XML representation as text
+            stack.extend((sub_group, group_element) for sub_group in reversed(current.sub_grps))
         return ET.tostring(xml, encoding="unicode")
 
+def load_numpy():
+    """
+    Imports numpy the first time it is needed.
+
+    Returns:
+        module: The numpy module, or None if it is not installed or the interpreter is not CPython.
+    """
+    global np, numpy_checked
+    if not numpy_checked:
+        numpy_checked = True
+        if sys.implementation.name == "cpython":
+            try:
+                import numpy as np
+            except ImportError:
+                pass
+    return np
+
+class BoundingBoxIndex:
+    """
+    Keeps the axis-aligned bounding box of every drawn shape so that area queries can be answered
+    without asking Tk. When numpy is installed the boxes are stored as rows of an array and
+    filtered in one vectorized pass; otherwise a dict of tuples is scanned. The storage is created
+    when the first box is added, so numpy is not imported until a shape is drawn.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty index.
+        """
+        self.rows = {}
+        self.free_rows = []
+        self.size = 0
+        self.np = None
+        self.boxes = None
+        self.ids = None
+
+    def set(self, shape_id, x1, y1, x2, y2):
+        """
+        Adds or updates the bounding box of a shape.
+
+        Args:
+            shape_id (int): The canvas ID of the shape.
+            x1, y1, x2, y2 (int): Two opposite corners of the shape, in any order.
+        """
+        box = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+        if self.boxes is None:
+            self.np = load_numpy()
+            if self.np is None:
+                self.boxes = {}
+            else:
+                self.boxes = self.np.zeros((64, 4))
+                self.ids = self.np.zeros(64, dtype=self.np.int64)  # 0 marks an unused row; canvas IDs start at 1
+        np = self.np
+        if np is None:
+            self.boxes[shape_id] = box
+            return
+        row = self.rows.get(shape_id)
+        if row is None:
+            if self.free_rows:
+                row = self.free_rows.pop()
+            else:
+                row = self.size
+                self.size += 1
+                if row == len(self.ids):
+                    self.boxes = np.concatenate((self.boxes, np.zeros_like(self.boxes)))
+                    self.ids = np.concatenate((self.ids, np.zeros_like(self.ids)))
+            self.rows[shape_id] = row
+            self.ids[row] = shape_id
+        self.boxes[row] = box
+
+    def remove(self, shape_id):
+        """
+        Removes the bounding box of a shape, if present.
+
+        Args:
+            shape_id (int): The canvas ID of the shape.
+        """
+        if self.boxes is None:
+            return
+        if self.np is None:
+            self.boxes.pop(shape_id, None)
+            return
+        row = self.rows.pop(shape_id, None)
+        if row is not None:
+            self.ids[row] = 0
+            self.free_rows.append(row)
+
+    def query(self, x1, y1, x2, y2):
+        """
+        Finds the shapes whose bounding boxes overlap an area.
+
+        Args:
+            x1, y1, x2, y2 (int): Two opposite corners of the area, in any order.
+
+        Returns:
+            list: The canvas IDs of the overlapping shapes.
+        """
+        qx1, qy1, qx2, qy2 = min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+        if self.boxes is None:
+            return []
+        if self.np is None:
+            return [shape_id for shape_id, (bx1, by1, bx2, by2) in self.boxes.items()
+                    if bx1 <= qx2 and bx2 >= qx1 and by1 <= qy2 and by2 >= qy1]
+        boxes, ids = self.boxes[:self.size], self.ids[:self.size]
+        mask = (boxes[:, 0] <= qx2) & (boxes[:, 2] >= qx1) & (boxes[:, 1] <= qy2) & (boxes[:, 3] >= qy1) & (ids != 0)
+        return ids[mask].tolist()
+
 class DrawCanvas(tk.Canvas):
     """
     Canvas widget for drawing shapes and performing various operations like saving, opening, editing, etc.
     """
+    # Canvas tag carried by the items of all selected shapes so they can be changed with one call
+    SELECTED_TAG = "selected"
+
     def __init__(self, master, **kwargs):
         """
         Initializes the DrawCanvas widget.
@@ -109,17 +380,20 @@ class DrawCanvas(tk.Canvas):
         self.bind("<B1-Motion>", self.on_drag)
         self.bind("<ButtonRelease-1>", self.on_release)
         self.shapes = []
-        self.shape_object = []
+        self.shape_object = {}
+        self.bounding_boxes = BoundingBoxIndex()
         self.selected_shapes = []
-        self.properties_text_ids = []
+        self._selected_set = set()
+        self.properties_text_ids = {}
         self.current_tool = None
         self.current_color = "black"
-        self.current_style = "s"
+        self.current_style = STYLE_SQUARE
         self.start_x = None
         self.start_y = None
         self.current_shape = None
+        self._pending_drag = None
+        self._drag_after_id = None
         self.file_manager = FileManager()
-        self.file_opened = False
         self.mode = ""
         self.moving = False
         self.canvas_group = []
@@ -147,24 +421,55 @@ class DrawCanvas(tk.Canvas):
 
     def redraw_shapes(self):
         """
-        Redraw all shapes stored in the file. Each shape is parsed from a string format,
-        instantiated, and drawn on the canvas.
+        Redraw all shapes stored in the file. All shape strings are parsed in a single pass,
+        instantiated, and then drawn directly on the canvas. Blank lines are ignored.
+
+        Returns:
+            list: The lines that do not describe a shape and were skipped.
         """
+        new_shapes = []
+        skipped = []
+        match_shape = SHAPE_LINE_PATTERN.fullmatch
         for shape_str in self.shapes:
-            shape_type, *args = shape_str.split(' ')
-            if shape_type == "line":
-                x1,y1,x2,y2 = int(args[0]),int(args[1]),int(args[2]),int(args[3])
-                color = args[-1]
-                self.current_shape = Line(self, x1, y1, x2, y2, color)
-                self.shape_object.append(self.current_shape)
-                self.current_shape.update(x1,y1,x2, y2)
-
-            elif shape_type == "rectangle":
-                x1,x2,y1, y2 = int(args[0]),int(args[1]),int(args[2]),int(args[3])
-                color, style = args[-2], args[-1]
-                self.current_shape = Rectangle(self, x1, y1,x2,y2, color, style)
-                self.shape_object .append(self.current_shape)
-                self.current_shape.update(x1,y1,x2, y2)
+            match = match_shape(shape_str.strip())
+            if match is None:
+                if shape_str.strip():
+                    skipped.append(shape_str)
+                continue
+            shape_type, x1, y1, x2, y2, color, style = match.groups()
+            if shape_type == "line" and style is None:
+                new_shapes.append(Line(self, int(x1), int(y1), int(x2), int(y2), color))
+            elif shape_type == "rectangle" and style is not None:
+                new_shapes.append(Rectangle(self, int(x1), int(y1), int(x2), int(y2), color, style))
+            else:
+                skipped.append(shape_str)
+        self.draw_loaded_shapes(new_shapes)
+        return skipped
+
+    def clear_drawing(self):
+        """
+        Remove every item from the canvas with a single delete and forget all shapes, groups,
+        the selection and properties text, so that a file can be loaded into an empty drawing.
+        """
+        self.delete("all")
+        self.shapes.clear()
+        self.shape_object.clear()
+        self.bounding_boxes = BoundingBoxIndex()
+        self.selected_shapes.clear()
+        self._selected_set.clear()
+        self.properties_text_ids.clear()
+        self.canvas_group.clear()
+        self.current_shape = None
+
+    def draw_loaded_shapes(self, new_shapes):
+        """
+        Draw shape objects loaded from a file. Each shape adds itself to 'shape_object' once drawn.
+
+        Parameters:
+            new_shapes (list): Line and Rectangle objects that have not been drawn yet.
+        """
+        for shape in new_shapes:
+            shape.draw()
 
     def set_mode(self, action):
         """
@@ -205,14 +510,35 @@ class DrawCanvas(tk.Canvas):
         """
         self.current_style = style
 
-    def clear_properties_text(self):
+    def configure_draw(self, color=None, tool=None, mode=None, style=None):
         """
-        Clear the properties text displayed beside shapes.
+        Set several drawing options in one call, as done by the draw menu entries. Options left
+        as None keep their current value.
+
+        Parameters:
+            color (str): The color to use for new shapes.
+            tool (str): The drawing tool to use, such as 'line' or 'rectangle'.
+            mode (str): The operational mode of the canvas, such as 'draw'.
+            style (str): The style to use for new rectangles, 's' or 'r'.
+        """
+        if color is not None:
+            self.current_color = color
+        if tool is not None:
+            self.current_tool = tool
+        if mode is not None:
+            self.mode = mode
+        if style is not None:
+            self.current_style = style
+
+    def clear_properties_text(self, keep=()):
         """
-        for text_id in self.properties_text_ids:
-            self.delete(text_id)
+        Clear the properties text displayed beside shapes.
 
-        self.properties_text_ids.clear()
+        Parameters:
+            keep (set): IDs of shapes whose properties text should stay on the canvas.
+        """
+        for shape_id in [shape_id for shape_id in self.properties_text_ids if shape_id not in keep]:
+            self.delete(self.properties_text_ids.pop(shape_id))
 
     def on_click(self, event):
         """
@@ -227,45 +553,73 @@ class DrawCanvas(tk.Canvas):
             self.mode = ""
 
         if self.selected_shapes:
-            for shape in self.selected_shapes:
-                self.itemconfig(shape.shape_id, width=1)
-            self.selected_shapes.clear()
+            self.itemconfig(self.SELECTED_TAG, width=1)
+            self.clear_selection()
             self.clear_properties_text()
 
+    def select_shape(self, shape):
+        """
+        Add a shape to the selection and tag its canvas item as selected.
+
+        Parameters:
+            shape (Shape): The shape to select.
+        """
+        self.selected_shapes.append(shape)
+        self._selected_set.add(shape)
+        self.addtag_withtag(self.SELECTED_TAG, shape.shape_id)
+
+    def clear_selection(self):
+        """
+        Empty the selection and remove the selected tag from all canvas items.
+        """
+        self.selected_shapes.clear()
+        self._selected_set.clear()
+        self.dtag(self.SELECTED_TAG)
+
 
     def construct_shape_from_shape_object(self):
         """
         Construct shapes from shape objects and store them as strings in the 'shapes' list.
         """
         self.shapes = []
-        for shape in self.shape_object:
-            shape_type = self.type(shape.shape_id)
-            if shape_type == 'rectangle':
-                self.shapes.append(f"{shape_type} {shape.x1} {shape.y1} {shape.x2} {shape.y2} {shape.color} {shape.style}")
+        for shape in self.shape_object.values():
+            if isinstance(shape, Rectangle):
+                self.shapes.append(f"rectangle {shape.x1} {shape.y1} {shape.x2} {shape.y2} {shape.color} {shape.style}")
             else:
-                self.shapes.append(f"{shape_type} {shape.x1} {shape.y1} {shape.x2} {shape.y2} {shape.color}")
+                self.shapes.append(f"line {shape.x1} {shape.y1} {shape.x2} {shape.y2} {shape.color}")
 
     def on_drag(self, event):
         """
-        Handle drag events on the canvas. Depending on the mode, perform actions like highlighting shapes,
-        drawing new shapes, or moving existing ones.
+        Handle drag events on the canvas. Motion events are coalesced: only the latest pointer
+        position is kept and it is processed by flush_drag once Tk is idle.
         """
+        if self._pending_drag is None:
+            self._drag_after_id = self.after_idle(self.flush_drag)
+        self._pending_drag = (event.x, event.y)
+
+    def flush_drag(self):
+        """
+        Process the latest pending drag position, if any. Depending on the mode, perform actions like
+        highlighting shapes, drawing new shapes, or moving existing ones.
+        """
+        if self._pending_drag is None:
+            return
+        x, y = self._pending_drag
+        self._pending_drag = None
 
         if self.mode in ["copy","edit", "delete", "group", "ungroup"]:
-            self.highlight_shapes_in_area(self.start_x, self.start_y, event.x, event.y)
+            self.highlight_shapes_in_area(self.start_x, self.start_y, x, y)
 
         elif self.mode == "move" and self.moving == False:
-            self.highlight_shapes_in_area(self.start_x, self.start_y, event.x, event.y)
+            self.highlight_shapes_in_area(self.start_x, self.start_y, x, y)
 
         elif self.mode == "draw":
             if self.current_tool:
                 if self.current_tool == "line":
-                    self.current_shape = Line(self, self.start_x, self.start_y, event.x, event.y, self.current_color)
-                    self.shape_object .append(self.current_shape)
+                    self.current_shape = Line(self, self.start_x, self.start_y, x, y, self.current_color)
                 elif self.current_tool == "rectangle":
-                    self.current_shape = Rectangle(self, self.start_x, self.start_y, event.x, event.y,self.current_color, self.current_style)
-                    self.shape_object .append(self.current_shape)
-            self.draw_shape(self.start_x,self.start_y,event.x,event.y)
+                    self.current_shape = Rectangle(self, self.start_x, self.start_y, x, y,self.current_color, self.current_style)
+            self.draw_shape(self.start_x,self.start_y,x,y)
 
     def draw_shape(self,start_x,start_y,end_x,end_y):
         """
@@ -278,8 +632,7 @@ class DrawCanvas(tk.Canvas):
             end_y (int): The ending y-coordinate of the shape.
         """
         if self.current_shape:
-            if self.file_opened == False:
-                self.current_shape.update(start_x,start_y,end_x,end_y)
+            self.current_shape.update(start_x,start_y,end_x,end_y)
             self.current_tool = None
 
     def on_release(self, event):
@@ -289,6 +642,11 @@ class DrawCanvas(tk.Canvas):
         Parameters:
             event: The event object containing the x, y coordinates of the mouse release event.
         """
+        # Apply the last motion event before acting on the selection or the drawn shape
+        if self._pending_drag is not None:
+            self.after_cancel(self._drag_after_id)
+            self.flush_drag()
+
         if self.mode == "copy":
             self.copy_shape()
             self.mode = ""
@@ -332,56 +690,64 @@ class DrawCanvas(tk.Canvas):
             x2 (int): The ending x-coordinate of the rectangle.
             y2 (int): The ending y-coordinate of the rectangle.
         """
-        if self.properties_text_ids:
-            self.delete(self.properties_text_ids)
-
-        overlapping_shapes = self.find_overlapping(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
-        overlapping_shapes_obj = []
-        for shape in overlapping_shapes:
-            for shape_obj in self.shape_object:
-                if shape == shape_obj.shape_id:
-                    overlapping_shapes_obj.append(shape_obj)
-
-        for shape_obj in overlapping_shapes_obj:
-            if shape_obj not in self.selected_shapes:
-                self.selected_shapes.append(shape_obj)
-                if len(shape_obj.groups) > 0:
-                    for group in shape_obj.groups:
-                        for shape in group.shapes:
-                            if shape not in self.selected_shapes:
-                                self.selected_shapes.append(shape)
+        overlapping_shapes = self.bounding_boxes.query(x1, y1, x2, y2)
+        shape_object = self.shape_object
+        selected_set = self._selected_set
+        select_shape = self.select_shape
+
+        # The index only compares bounding boxes, so each candidate checks its own outline as well
+        for shape_obj in [shape_object[i] for i in overlapping_shapes]:
+            if not shape_obj.overlaps(x1, y1, x2, y2):
+                continue
+            if shape_obj not in selected_set:
+                select_shape(shape_obj)
+                for group in shape_obj.groups:
+                    for shape in group.shapes:
+                        if shape not in selected_set:
+                            select_shape(shape)
 
-        for shape in self.selected_shapes:
-            self.itemconfig(shape.shape_id, width=3)
-            x1, y1, x2, y2 = self.bbox(shape.shape_id)
-            center_x = (x1 + x2) / 2
-            center_y = (y1 + y2) / 2
-
-            shape_type = self.type(shape.shape_id)
-            if shape_type == "rectangle":
-                color = self.itemcget(shape.shape_id, "outline")
-                tags = self.gettags(shape.shape_id)
-                if "r" in tags:
-                    style = "r"
+        if self.selected_shapes:
+            self.itemconfig(self.SELECTED_TAG, width=3)
+
+        shown = set()
+        if self.mode not in ["delete","move","copy", "group", "ungroup"]:
+            # Bound once here, since this loop runs for every selected shape on every drag event
+            text_ids = self.properties_text_ids
+            create_text, coords, itemconfig = self.create_text, self.coords, self.itemconfig
+            for shape in self.selected_shapes:
+                # Position, color and style are all kept on the shape object, so the canvas is not queried
+                center_x = (shape.x1 + shape.x2) / 2
+                center_y = (shape.y1 + shape.y2) / 2
+
+                if isinstance(shape, Rectangle):
+                    properties_text = f"Color: {shape.color}\nStyle: {shape.style}"
                 else:
-                    style = "s"
-                properties_text = f"Color: {color}\nStyle: {style}"
-            else:
-                color = self.itemcget(shape.shape_id, "fill")
-                properties_text = f"Color: {color}"
+                    properties_text = f"Color: {shape.color}"
 
-            if self.mode not in ["delete","move","copy", "group", "ungroup"]:
-                text = self.create_text(center_x, center_y, text=properties_text, anchor="nw")
-                self.properties_text_ids.append(text)
+                # Reuse the text item created for this shape on an earlier drag event
+                text_id = text_ids.get(shape.shape_id)
+                if text_id is None:
+                    text_ids[shape.shape_id] = create_text(center_x, center_y, text=properties_text, anchor="nw")
+                else:
+                    coords(text_id, center_x, center_y)
+                    itemconfig(text_id, text=properties_text)
+                shown.add(shape.shape_id)
+
+        self.clear_properties_text(keep=shown)
 
     def delete_shape(self):
         """
-        Delete the currently selected shapes from the canvas and internal storage.
+        Delete the currently selected shapes from the canvas and internal storage, and remove them
+        from their groups so that selecting another member of a group cannot bring them back.
         """
         for shape in self.selected_shapes:
             self.delete(shape.shape_id)
-            self.shape_object.remove(shape)
-        self.selected_shapes.clear()
+            self.shape_object.pop(shape.shape_id, None)
+            self.bounding_boxes.remove(shape.shape_id)
+            for group in shape.groups:
+                group.remove_shapes(shape)
+            shape.groups = []
+        self.clear_selection()
 
     def copy_shape(self):
         """
@@ -389,22 +755,13 @@ class DrawCanvas(tk.Canvas):
         """
         offset_x, offset_y = 50, 50
         for shape in self.selected_shapes:
-            coords = self.coords(shape.shape_id)
-            shape_type = self.type(shape.shape_id)
-
-            new_coords = [coord + offset_x if i % 2 == 0 else coord + offset_y for i, coord in enumerate(coords)]
-            if shape_type == 'rectangle':
-                color = self.itemcget(shape.shape_id, "outline")  # Assuming shapes are filled; adjust attribute as needed
-                style = "r" if "r" in self.itemcget(shape.shape_id, "tags") else "s"
-                self.current_shape = Rectangle(self, new_coords[0],new_coords[1],new_coords[2],new_coords[3], color, style)
-                self.shape_object.append(self.current_shape)
-                self.draw_shape(new_coords[0],new_coords[1],new_coords[2],new_coords[3])
-
-            elif shape_type == 'line':
-                color = self.itemcget(shape.shape_id, "fill")
-                self.current_shape = Line(self, new_coords[0],new_coords[1], new_coords[2],new_coords[3], color)
-                self.shape_object .append(self.current_shape)
-                self.draw_shape(new_coords[0],new_coords[1],new_coords[2],new_coords[3])
+            x1, y1 = shape.x1 + offset_x, shape.y1 + offset_y
+            x2, y2 = shape.x2 + offset_x, shape.y2 + offset_y
+            if isinstance(shape, Rectangle):
+                self.current_shape = Rectangle(self, x1, y1, x2, y2, shape.color, shape.style)
+            else:
+                self.current_shape = Line(self, x1, y1, x2, y2, shape.color)
+            self.draw_shape(x1, y1, x2, y2)
 
     def move_shape(self,event):
         """
@@ -415,31 +772,17 @@ class DrawCanvas(tk.Canvas):
         """
         self.moving = True
         if self.selected_shapes:
-            shape = self.selected_shapes[0]
-            first_shape_id = self.selected_shapes[0].shape_id
-            initial_coords = self.coords(first_shape_id)
-            dx, dy = event.x - ((initial_coords[2] + initial_coords[0])/2), event.y -((initial_coords[3] + initial_coords[1])/2)
-
-            self.shape_object.remove(shape)
-            self.move(shape.shape_id, dx, dy)
-
-            shape.x1 += dx
-            shape.x2 += dx
-            shape.y1 += dy
-            shape.y2 += dy
-
-            self.shape_object.append(shape)
+            first_shape = self.selected_shapes[0]
+            dx = round(event.x - (first_shape.x1 + first_shape.x2) / 2)
+            dy = round(event.y - (first_shape.y1 + first_shape.y2) / 2)
 
-        for shape in self.selected_shapes[1:]:
-            self.shape_object.remove(shape)
-            self.move(shape.shape_id, dx, dy)
-
-            shape.x1 += dx
-            shape.x2 += dx
-            shape.y1 += dy
-            shape.y2 += dy
-
-            self.shape_object.append(shape)
+            self.move(self.SELECTED_TAG, dx, dy)
+            for shape in self.selected_shapes:
+                shape.x1 += dx
+                shape.x2 += dx
+                shape.y1 += dy
+                shape.y2 += dy
+                shape.update_bounds()
 
     def edit_selected_shape(self):
         """
@@ -449,19 +792,20 @@ class DrawCanvas(tk.Canvas):
             self.show_popup_message("Multiple objects cannot be edited at once")
             return
 
-        shape_id = self.selected_shapes[0].shape_id
-        shape_type = self.type(shape_id)
+        shape = self.selected_shapes[0]
+        shape_id = shape.shape_id
 
-        if shape_type == 'rectangle':
+        if isinstance(shape, Rectangle):
             new_color = simpledialog.askstring("Input", "Enter new color (e.g., red, blue, green):", parent=self.master)
 
             new_style = simpledialog.askstring("Input", "Enter new style (s or r):", parent=self.master)
             if new_style and new_color:
                 self.update_rectangle_style(shape_id, new_style,new_color)
 
-        elif shape_type == 'line':
+        else:
             new_color = simpledialog.askstring("Input", "Enter new color (e.g., red, blue, green):", parent=self.master)
             if new_color:
+                shape.color = sys.intern(new_color)
                 self.itemconfig(shape_id, fill=new_color)
 
         self.delete_shape()
@@ -478,9 +822,9 @@ class DrawCanvas(tk.Canvas):
         """
         coords = self.coords(shape_id)
         self.current_shape = Rectangle(self, coords[0], coords[1], coords[2], coords[3],color,style)
-        if style == 'r':
+        if style == STYLE_ROUNDED:
             self.current_shape.draw_rounded_rectangle(coords[0], coords[1], coords[2], coords[3], radius=20, outline=color, fill='')
-        elif style == 's':
+        elif style == STYLE_SQUARE:
             self.current_shape = self.create_rectangle(coords[0], coords[1], coords[2], coords[3], outline=color)
 
     def group_shapes (self):
@@ -529,6 +873,8 @@ class Group:
     Attributes:
         shapes (list): A list containing the shapes that belong to this group.
     """
+    __slots__ = ('shapes', 'indv_shapes', 'sub_grps')
+
     def __init__(self):
         """
         Initialize a new Group object.
@@ -575,6 +921,8 @@ class Shape:
         shape_id: The unique identifier for the shape in the canvas, can be None if not drawn yet.
         groups (list): A list of groups that this shape is part of.
     """
+    __slots__ = ('canvas', 'color', 'x1', 'x2', 'y1', 'y2', 'shape_id', 'groups')
+
     def __init__(self, canvas, x1,y1,x2,y2, color):
         """
         Initialize a new Shape object with specified parameters.
@@ -588,7 +936,8 @@ class Shape:
             color (str): The color of the shape.
         """
         self.canvas = canvas
-        self.color = color
+        # Drawings reuse a handful of color names, so every shape shares one interned string per color
+        self.color = sys.intern(color)
         self.x1 = x1
         self.x2 = x2
         self.y1 = y1
@@ -605,6 +954,38 @@ class Shape:
         """
         self.groups.append(Group)
 
+    def set_shape_id(self, shape_id):
+        """
+        Record the canvas ID of the shape and register the shape under it in the canvas 'shape_object' dict.
+
+        Parameters:
+            shape_id (int): The canvas ID of the item now representing this shape.
+        """
+        self.canvas.shape_object.pop(self.shape_id, None)
+        self.canvas.bounding_boxes.remove(self.shape_id)
+        self.shape_id = shape_id
+        self.canvas.shape_object[shape_id] = self
+        self.update_bounds()
+
+    def update_bounds(self):
+        """
+        Record the current coordinates of the shape in the bounding box index of its canvas.
+        """
+        self.canvas.bounding_boxes.set(self.shape_id, self.x1, self.y1, self.x2, self.y2)
+
+    def overlaps(self, x1, y1, x2, y2):
+        """
+        Check whether the shape itself overlaps an area whose bounding boxes already overlap. By default
+        the bounding box is taken as the shape; subclasses whose outline covers less of it refine this.
+
+        Parameters:
+            x1, y1, x2, y2 (int): Two opposite corners of the area, in any order.
+
+        Returns:
+            bool: True if the shape overlaps the area.
+        """
+        return True
+
     def update(self):
         """
         Update the properties of the shape. This method must be implemented by subclasses.
@@ -614,6 +995,16 @@ class Shape:
         """
         raise NotImplementedError("This method should be overridden by subclasses")
 
+    def draw(self):
+        """
+        Create the canvas item for a shape that has not been drawn yet, using its stored coordinates.
+        This method must be implemented by subclasses.
+
+        Raises:
+            NotImplementedError: If the subclass does not implement this method.
+        """
+        raise NotImplementedError("This method should be overridden by subclasses")
+
     def finalize(self):
         """
         Perform any final adjustments after the shape is fully created and drawn.
@@ -631,6 +1022,8 @@ class Line(Shape):
     Inherits from:
         Shape: The base class for shapes drawn on a canvas.
     """
+    __slots__ = ()
+
     def __init__(self, canvas, start_x, start_y, end_x, end_y, color):
         """
         Initialize a new Line object.
@@ -647,7 +1040,7 @@ class Line(Shape):
 
     def update(self, start_x,start_y,end_x, end_y):
         """
-        Update the position and draw the line on the canvas.
+        Update the position of the line, drawing it on the canvas the first time.
 
         Parameters:
             start_x (int): The new x-coordinate of the start point.
@@ -655,9 +1048,62 @@ class Line(Shape):
             end_x (int): The new x-coordinate of the end point.
             end_y (int): The new y-coordinate of the end point.
         """
-        if self.shape_id:
-            self.canvas.delete(self.shape_id)
-        self.shape_id = self.canvas.create_line(start_x, start_y, end_x, end_y, fill=self.color)
+        self.x1, self.y1, self.x2, self.y2 = start_x, start_y, end_x, end_y
+        if self.shape_id is None:
+            self.draw()
+        else:
+            self.canvas.coords(self.shape_id, start_x, start_y, end_x, end_y)
+            self.update_bounds()
+
+    def draw(self):
+        """
+        Create the line on the canvas from its stored coordinates.
+        """
+        self.set_shape_id(self.canvas.create_line(self.x1, self.y1, self.x2, self.y2, fill=self.color))
+
+    def overlaps(self, x1, y1, x2, y2):
+        """
+        Check whether the line segment itself crosses an area, so that a drag near a long diagonal line
+        but inside its bounding box does not select it. The segment is clipped against the area.
+
+        Parameters:
+            x1, y1, x2, y2 (int): Two opposite corners of the area, in any order.
+
+        Returns:
+            bool: True if some part of the line lies inside the area.
+        """
+        dx = self.x2 - self.x1
+        dy = self.y2 - self.y1
+        enter, leave = 0.0, 1.0
+        for p, q in ((-dx, self.x1 - min(x1, x2)), (dx, max(x1, x2) - self.x1),
+                     (-dy, self.y1 - min(y1, y2)), (dy, max(y1, y2) - self.y1)):
+            if p == 0:
+                if q < 0:
+                    return False
+            elif p < 0:
+                enter = max(enter, q / p)
+            else:
+                leave = min(leave, q / p)
+            if enter > leave:
+                return False
+        return True
+
+    def to_element(self):
+        """
+        Convert the line object to an XML element for saving.
+
+        Returns:
+            Element: A <line> element with begin, end and color children.
+        """
+        element = ET.Element("line")
+        begin = ET.SubElement(element, "begin")
+        ET.SubElement(begin, "x").text = str(self.x1)
+        ET.SubElement(begin, "y").text = str(self.y1)
+        end = ET.SubElement(element, "end")
+        ET.SubElement(end, "x").text = str(self.x2)
+        ET.SubElement(end, "y").text = str(self.y2)
+        ET.SubElement(element, "color").text = self.color
+        return element
 
     def to_xml(self):
         """
@@ -666,11 +1112,7 @@ class Line(Shape):
         Returns:
             str: A string representing the line in XML format.
         """
-        xml = "<line>\n"
-        xml += f"\t<begin>\n\t\t<x>{self.x1}</x>\n\t\t<y>{self.y1}</y>\n\t</begin>\n"
-        xml += f"\t<end>\n\t\t<x>{self.x2}</x>\n\t\t<y>{self.y2}</y>\n\t</end>\n"
-        xml += f"\t<color>{self.color}</color>\n</line>\n"
-        return xml
+        return ET.tostring(self.to_element(), encoding="unicode")
 
 class Rectangle(Shape):
     """
@@ -680,6 +1122,16 @@ class Rectangle(Shape):
     Inherits from:
         Shape: The base class for shapes drawn on a canvas.
     """
+    __slots__ = ('style',)
+
+    # Outline of a rounded rectangle walked clockwise from the top-left corner. Each entry is
+    # (x index, x radius sign, y index, y radius sign), where index 0 picks x1/y1 and 1 picks x2/y2.
+    ROUNDED_POINT_TEMPLATE = (
+        (0, 1, 0, 0), (0, 1, 0, 0), (1, -1, 0, 0), (1, -1, 0, 0), (1, 0, 0, 0),
+        (1, 0, 0, 1), (1, 0, 0, 1), (1, 0, 1, -1), (1, 0, 1, -1), (1, 0, 1, 0),
+        (1, -1, 1, 0), (1, -1, 1, 0), (0, 1, 1, 0), (0, 1, 1, 0), (0, 0, 1, 0),
+        (0, 0, 1, -1), (0, 0, 1, -1), (0, 0, 0, 1), (0, 0, 0, 1), (0, 0, 0, 0),
+    )
 
     def __init__(self, canvas, start_x, start_y, end_x, end_y, color, style):
         """
@@ -695,11 +1147,11 @@ class Rectangle(Shape):
             style (str): The style of the rectangle ('s' for sharp corners, 'r' for rounded corners).
         """
         super().__init__(canvas, start_x, start_y, end_x, end_y, color)
-        self.style = style
+        self.style = sys.intern(style)
 
     def update(self, start_x,start_y,end_x, end_y):
         """
-        Update the position and redraw the rectangle on the canvas.
+        Update the position of the rectangle, drawing it on the canvas the first time.
 
         Parameters:
             start_x (int): The new x-coordinate of the upper-left corner.
@@ -707,12 +1159,39 @@ class Rectangle(Shape):
             end_x (int): The new x-coordinate of the lower-right corner.
             end_y (int): The new y-coordinate of the lower-right corner.
         """
-        if self.shape_id:
-            self.canvas.delete(self.shape_id)
-        if self.style == "s":
-            self.shape_id = self.canvas.create_rectangle(start_x, start_y, end_x, end_y, outline=self.color)
-        elif self.style == "r":
-            self.shape_id = self.draw_rounded_rectangle(start_x, start_y, end_x, end_y, radius=20, outline=self.color, fill='')
+        self.x1, self.y1, self.x2, self.y2 = start_x, start_y, end_x, end_y
+        if self.shape_id is None:
+            self.draw()
+        else:
+            if self.style == STYLE_SQUARE:
+                self.canvas.coords(self.shape_id, start_x, start_y, end_x, end_y)
+            elif self.style == STYLE_ROUNDED:
+                self.canvas.coords(self.shape_id, self._compute_points(start_x, start_y, end_x, end_y, radius=20))
+            self.update_bounds()
+
+    def draw(self):
+        """
+        Create the rectangle on the canvas from its stored coordinates.
+        """
+        if self.style == STYLE_SQUARE:
+            self.set_shape_id(self.canvas.create_rectangle(self.x1, self.y1, self.x2, self.y2, outline=self.color))
+        elif self.style == STYLE_ROUNDED:
+            self.set_shape_id(self.draw_rounded_rectangle(self.x1, self.y1, self.x2, self.y2, radius=20, outline=self.color, fill=''))
+
+    def overlaps(self, x1, y1, x2, y2):
+        """
+        Check whether the outline of the rectangle overlaps an area. Rectangles are drawn unfilled, so
+        as with Tk's find_overlapping, an area lying strictly inside the rectangle does not touch it.
+        This applies to both square and rounded corners.
+
+        Parameters:
+            x1, y1, x2, y2 (int): Two opposite corners of the area, in any order.
+
+        Returns:
+            bool: False if the area is strictly inside the rectangle, True otherwise.
+        """
+        return not (min(self.x1, self.x2) < min(x1, x2) and max(x1, x2) < max(self.x1, self.x2)
+                    and min(self.y1, self.y2) < min(y1, y2) and max(y1, y2) < max(self.y1, self.y2))
 
     def draw_rounded_rectangle(self, x1, y1, x2, y2, radius, **kwargs):
         """
@@ -729,11 +1208,43 @@ class Rectangle(Shape):
         Returns:
             int: Canvas ID of the created polygon representing the rounded rectangle.
         """
-        points = [x1 + radius, y1, x1 + radius, y1, x2 - radius, y1, x2 - radius, y1, x2, y1,
-                  x2, y1 + radius, x2, y1 + radius, x2, y2 - radius, x2, y2 - radius, x2, y2,
-                  x2 - radius, y2, x2 - radius, y2, x1 + radius, y2, x1 + radius, y2, x1, y2,
-                  x1, y2 - radius, x1, y2 - radius, x1, y1 + radius, x1, y1 + radius, x1, y1]
-        return self.canvas.create_polygon(points, **kwargs, smooth=True)
+        return self.canvas.create_polygon(self._compute_points(x1, y1, x2, y2, radius), **kwargs, smooth=True)
+
+    def _compute_points(self, x1, y1, x2, y2, radius):
+        """
+        Compute the polygon points outlining a rounded rectangle from ROUNDED_POINT_TEMPLATE.
+
+        Parameters:
+            x1 (int): The x-coordinate of the upper-left corner.
+            y1 (int): The y-coordinate of the upper-left corner.
+            x2 (int): The x-coordinate of the lower-right corner.
+            y2 (int): The y-coordinate of the lower-right corner.
+            radius (int): The radius of the corner curves.
+
+        Returns:
+            list: Flat list of x, y coordinates for a smoothed polygon.
+        """
+        xs, ys = (x1, x2), (y1, y2)
+        return [coord for xi, xr, yi, yr in self.ROUNDED_POINT_TEMPLATE
+                for coord in (xs[xi] + xr * radius, ys[yi] + yr * radius)]
+
+    def to_element(self):
+        """
+        Convert the rectangle object to an XML element for saving.
+
+        Returns:
+            Element: A <rectangle> element with upper-left, lower-right, color and corner children.
+        """
+        element = ET.Element("rectangle")
+        upper_left = ET.SubElement(element, "upper-left")
+        ET.SubElement(upper_left, "x").text = str(self.x1)
+        ET.SubElement(upper_left, "y").text = str(self.y1)
+        lower_right = ET.SubElement(element, "lower-right")
+        ET.SubElement(lower_right, "x").text = str(self.x2)
+        ET.SubElement(lower_right, "y").text = str(self.y2)
+        ET.SubElement(element, "color").text = self.color
+        ET.SubElement(element, "corner").text = self.style
+        return element
 
     def to_xml(self):
         """
@@ -742,13 +1253,7 @@ class Rectangle(Shape):
         Returns:
             str: A string representing the rectangle in XML format.
         """
-        xml = "<rectangle>\n"
-        xml += f"\t<upper-left>\n\t\t<x>{self.x1}</x>\n\t\t<y>{self.y1}</y>\n\t</upper-left>\n"
-        xml += f"\t<lower-right>\n\t\t<x>{self.x2}</x>\n\t\t<y>{self.y2}</y>\n\t</lower-right>\n"
-        xml += f"\t<color>{self.color}</color>\n"
-        xml += f"\t<corner>{self.style}</corner>\n"
-        xml += "</rectangle>\n"
-        return xml
+        return ET.tostring(self.to_element(), encoding="unicode")
 
 
 class DrawingApp:
@@ -768,6 +1273,17 @@ class DrawingApp:
         self.canvas = DrawCanvas(self.master, width=1000, height=1000, bg="white")
         self.canvas.pack()
 
+        # Menu commands are created once and reused, so rebuilding a menu never registers new Tcl commands
+        configure_draw = self.canvas.configure_draw
+        self.draw_handlers = {(tool, color): partial(configure_draw, color=color, tool=tool, mode="draw")
+                              for tool in ("line", "rectangle") for color in map(str.lower, COLORS)}
+        self.style_handlers = {style: partial(configure_draw, style=style, tool="rectangle", mode="draw")
+                               for style in (STYLE_SQUARE, STYLE_ROUNDED)}
+        set_mode = self.canvas.set_mode
+        self.mode_handlers = {mode: partial(set_mode, mode)
+                              for mode in ("copy", "move", "delete", "edit", "group", "ungroup")}
+
+        self.command_names = {}
         self.create_menu()
 
         if len(sys.argv) > 1:
@@ -776,53 +1292,136 @@ class DrawingApp:
 
     def create_menu(self):
         """
-        Create the menu bar and its sub-menus for the application, including drawing tools
-        and file management options.
-        """
-        menubar = tk.Menu(self.master)
-        self.master.config(menu=menubar)
-
-        draw_menu = tk.Menu(menubar, tearoff=0)
-        file_menu = tk.Menu(menubar, tearoff=0)
-
-        line_menu = tk.Menu(draw_menu, tearoff=0)
-        color_menu_line = tk.Menu(line_menu, tearoff=0)
-        color_menu_line.add_command(label="Black", command=lambda: (self.canvas.set_color("black"), self.canvas.set_tool("line"),self.canvas.set_mode("draw")))
-        color_menu_line.add_command(label="Blue", command=lambda: (self.canvas.set_color("blue"),self.canvas.set_tool("line"),self.canvas.set_mode("draw")))
-        color_menu_line.add_command(label="Green", command=lambda: (self.canvas.set_color("green"),self.canvas.set_tool("line"),self.canvas.set_mode("draw")))
-        color_menu_line.add_command(label="Red", command=lambda: (self.canvas.set_color("red"),self.canvas.set_tool("line"),self.canvas.set_mode("draw")))
-        line_menu.add_cascade(label="Color", menu=color_menu_line)
-        draw_menu.add_cascade(label="Line", menu=line_menu)
-
-        rectangle_menu = tk.Menu(draw_menu, tearoff=0)
-        color_menu_rect = tk.Menu(rectangle_menu, tearoff=0)
-        color_menu_rect.add_command(label="Black", command=lambda: (self.canvas.set_color("black"),self.canvas.set_tool("rectangle"),self.canvas.set_mode("draw")))
-        color_menu_rect.add_command(label="Blue", command=lambda: (self.canvas.set_color("blue"),self.canvas.set_tool("rectangle"),self.canvas.set_mode("draw")))
-        color_menu_rect.add_command(label="Green", command=lambda: (self.canvas.set_color("green"),self.canvas.set_tool("rectangle"),self.canvas.set_mode("draw")))
-        color_menu_rect.add_command(label="Red", command=lambda: (self.canvas.set_color("red"),self.canvas.set_tool("rectangle"),self.canvas.set_mode("draw")))
-        rectangle_menu.add_cascade(label="Color", menu=color_menu_rect)
-        style_menu = tk.Menu(rectangle_menu, tearoff=0)
-        style_menu.add_command(label="Square Corners", command=lambda: (self.canvas.set_style("s"),self.canvas.set_tool("rectangle"),self.canvas.set_mode("draw")))
-        style_menu.add_command(label="Rounded Corners", command=lambda: (self.canvas.set_style("r"),self.canvas.set_tool("rectangle"),self.canvas.set_mode("draw")))
-        rectangle_menu.add_cascade(label="Style", menu=style_menu)
-        draw_menu.add_cascade(label="Rectangle", menu=rectangle_menu)
-
-        edit_menu = tk.Menu(menubar, tearoff=0)
-        edit_menu.add_command(label="Copy", command=lambda: (self.canvas.set_mode("copy")))
-        edit_menu.add_command(label="Move", command=lambda: (self.canvas.set_mode("move")))
-        edit_menu.add_command(label="Delete", command=lambda: (self.canvas.set_mode("delete")))
-        edit_menu.add_command(label="Edit", command=lambda: (self.canvas.set_mode("edit")))
-        edit_menu.add_command(label="Group Objects", command=lambda: (self.canvas.set_mode("group")))
-        edit_menu.add_command(label="Ungroup Objects", command=lambda: (self.canvas.set_mode("ungroup")))
-
-
-        file_menu.add_command(label="Open", command=self.canvas.open_file)
-        file_menu.add_command(label="Save", command=self.canvas.save_file)
-        file_menu.add_command(label="Export", command=self.canvas.save_to_xml)
-
-        menubar.add_cascade(label="Draw", menu=draw_menu)
-        menubar.add_cascade(label="Actions", menu=edit_menu)
-        menubar.add_cascade(label="File", menu=file_menu)
+        Create the menu bar for the application and attach it to the window. Its cascades are added
+        by build_menus once the event loop is idle, so the window can be shown first.
+        """
+        self.menubar = tk.Menu(self.master)
+        self.master.config(menu=self.menubar)
+        self.master.after_idle(self.build_menus)
+
+    def build_menus(self):
+        """
+        Add the top-level cascades to the menu bar, including drawing tools and file management options.
+        Their entries are built the first time each cascade is opened.
+        """
+        self.build_menu(self.menubar, self.menu_spec(), lazy=True)
+
+    def menu_spec(self):
+        """
+        Describe the menu bar declaratively. Each entry is a (label, item) pair where item is either
+        a list of further entries, for a cascade, or the command run when the entry is chosen. An item of
+        None makes a disabled heading, and (None, None) a separator. A cascade entry may carry a third
+        element: a function called with the cascade's menu just before it is posted.
+
+        Returns:
+            list: The entries of the menu bar, in display order.
+        """
+        canvas = self.canvas
+        actions = [("Copy", "copy"), ("Move", "move"), ("Delete", "delete"), ("Edit", "edit"),
+                   ("Group Objects", "group"), ("Ungroup Objects", "ungroup")]
+        # Cascades are listed by how often they are opened: a tool and color are picked for nearly every
+        # shape, actions less often, files least. The order is fixed here and never changed at runtime.
+        return [
+            ("Draw", [
+                ("Line", [
+                    ("Color", None),
+                    *[(color, self.draw_handlers[("line", color.lower())]) for color in COLORS],
+                ]),
+                ("Rectangle", [
+                    ("Color", None),
+                    *[(color, self.draw_handlers[("rectangle", color.lower())]) for color in COLORS],
+                    (None, None),
+                    ("Style", None),
+                    ("Square Corners", self.style_handlers[STYLE_SQUARE]),
+                    ("Rounded Corners", self.style_handlers[STYLE_ROUNDED]),
+                ]),
+            ]),
+            ("Actions", [(label, self.mode_handlers[mode]) for label, mode in actions],
+             self.refresh_actions_menu),
+            ("File", [
+                ("Open", canvas.open_file),
+                ("Save", canvas.save_file),
+                ("Export", canvas.save_to_xml),
+            ]),
+        ]
+
+    def build_menu(self, menu, spec, lazy=False):
+        """
+        Add the entries described by a menu spec to a menu, creating a tk.Menu only for cascades.
+        Commands are passed to Tk by their registered names, so shared handlers are registered once.
+
+        Parameters:
+            menu (tk.Menu): The menu to fill.
+            spec (list): (label, item) pairs as returned by menu_spec.
+            lazy (bool): If True, cascades are left empty and filled by fill_menu when first posted.
+        """
+        for label, item, *on_post in spec:
+            if isinstance(item, list):
+                submenu = tk.Menu(menu, tearoff=0)
+                post_name = self.command_name(partial(on_post[0], submenu)) if on_post else ""
+                if lazy:
+                    post_name = self.master.register(partial(self.fill_menu, submenu, item, post_name))
+                if post_name:
+                    submenu.configure(postcommand=post_name)
+                if not lazy:
+                    self.build_menu(submenu, item)
+                menu.add_cascade(label=label, menu=submenu)
+            elif label is None:
+                menu.add_separator()
+            elif item is None:
+                menu.add_command(label=label, state="disabled")
+            else:
+                menu.add_command(label=label, command=self.command_name(item))
+
+    def command_name(self, command):
+        """
+        Return the Tcl name of a menu command, registering it on first use. Commands shared by several
+        menu entries are registered only once.
+
+        Parameters:
+            command (callable): The function run when the entry is chosen.
+
+        Returns:
+            str: The name of the Tcl command that calls it.
+        """
+        name = self.command_names.get(command)
+        if name is None:
+            name = self.command_names[command] = self.master.register(command)
+        return name
+
+    def fill_menu(self, menu, spec, post_name):
+        """
+        Build the entries of a lazily created cascade the first time it is posted. The postcommand is
+        then handed over to the cascade's own post hook, or cleared if it has none, and the one-shot
+        Tcl command that called this method is deleted.
+
+        Parameters:
+            menu (tk.Menu): The cascade being posted.
+            spec (list): The entries to build into it.
+            post_name (str): The Tcl name of the cascade's post hook, or "" if it has none.
+        """
+        fill_name = menu.cget("postcommand")
+        self.build_menu(menu, spec)
+        menu.configure(postcommand=post_name)
+        # The command is still running, so it is deleted once Tk is idle rather than from inside itself
+        self.master.after_idle(self.master.deletecommand, fill_name)
+        if post_name:
+            menu.tk.call(post_name)
+
+    def refresh_actions_menu(self, menu):
+        """
+        Enable only the actions that can apply to the current drawing. Tk calls this just before the
+        Actions menu is posted; the existing entries are updated in place rather than rebuilt.
+
+        Parameters:
+            menu (tk.Menu): The Actions menu.
+        """
+        shape_count = len(self.canvas.shape_object)
+        has_shapes = "normal" if shape_count else "disabled"
+        for label in ("Copy", "Move", "Delete", "Edit"):
+            menu.entryconfigure(label, state=has_shapes)
+        menu.entryconfigure("Group Objects", state="normal" if shape_count > 1 else "disabled")
+        menu.entryconfigure("Ungroup Objects", state="normal" if self.canvas.canvas_group else "disabled")
 
 def main():
     root = tk.Tk()